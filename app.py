@@ -3,6 +3,10 @@ import logging
 from flask import Flask, request, jsonify, render_template
 from flask_cors import CORS
 from services.ocr_processor import OCRProcessor
+from services.loop_local import on_server_loop
+from json_provider import OrjsonProvider
+from pydantic import ValidationError
+from schemas import OCRTextRequest, validation_error_body
 import signal
 import sys
 
@@ -19,13 +23,22 @@ logger = logging.getLogger(__name__)
 
 # Create Flask app
 app = Flask(__name__)
+app.json = OrjsonProvider(app)
 app.secret_key = os.environ.get("SESSION_SECRET", "dev-secret-key")
 
 # Enable CORS for mobile app compatibility
 CORS(app, origins=["*"])
 
-# Initialize OCR processor
-ocr_processor = OCRProcessor()
+# OCR processor is created lazily so each Gunicorn worker builds its own
+# HTTP sessions after fork instead of inheriting them from the master
+_ocr_processor = None
+
+def get_ocr_processor() -> OCRProcessor:
+    """Return the per-process OCR processor, creating it on first use"""
+    global _ocr_processor
+    if _ocr_processor is None:
+        _ocr_processor = OCRProcessor()
+    return _ocr_processor
 
 # Graceful shutdown handler
 def signal_handler(sig, frame):
@@ -41,7 +54,7 @@ def index():
     return render_template('index.html')
 
 @app.route('/api/process-ocr', methods=['POST'])
-def process_ocr():
+async def process_ocr():
     """
     Process OCR text containing dish names and partial ingredients
     Returns structured ingredient lists
@@ -53,31 +66,32 @@ def process_ocr():
                 'error': 'Content-Type must be application/json'
             }), 400
         
-        data = request.get_json()
-        
-        # Validate required fields
-        if 'ocr_text' not in data:
-            return jsonify({
-                'error': 'Missing required field: ocr_text'
-            }), 400
+        # Validate required fields straight from the request body
+        try:
+            body = OCRTextRequest.model_validate_json(request.get_data())
+        except ValidationError as e:
+            return jsonify(validation_error_body(e)), 400
         
-        ocr_text = data['ocr_text'].strip()
-        if not ocr_text:
-            return jsonify({
-                'error': 'ocr_text cannot be empty'
-            }), 400
+        ocr_text = body.ocr_text
         
-        logger.info(f"Processing OCR text: {ocr_text[:100]}...")
+        logger.info("Processing OCR text: %.100s...", ocr_text)
         
         # Process the OCR text
-        result = ocr_processor.process_ocr_text(ocr_text)
+        processor = get_ocr_processor()
+        try:
+            result = await processor.process_ocr_text_async(ocr_text)
+        finally:
+            # Outside the ASGI server each request runs on a fresh event loop,
+            # so release its connections rather than leak them
+            if not on_server_loop():
+                await processor.aclose()
         
-        logger.info(f"Successfully processed OCR text, found {len(result.get('dishes', []))} dishes")
+        logger.info("Successfully processed OCR text, found %d dishes", len(result.get('dishes', [])))
         
         return jsonify(result)
         
     except Exception as e:
-        logger.error(f"Error processing OCR text: {str(e)}")
+        logger.error("Error processing OCR text: %s", e)
         return jsonify({
             'error': 'Internal server error occurred while processing OCR text',
             'details': str(e) if app.debug else None
@@ -98,7 +112,7 @@ def not_found(error):
 
 @app.errorhandler(500)
 def internal_error(error):
-    logger.error(f"Internal server error: {error}")
+    logger.error("Internal server error: %s", error)
     return jsonify({'error': 'Internal server error'}), 500
 
 if __name__ == '__main__':
@@ -110,4 +124,4 @@ if __name__ == '__main__':
         logger.warning("Running in development mode")
         app.run(host='0.0.0.0', port=port, debug=True)
     else:
-        logger.info("Use 'gunicorn wsgi:app' for production")
+        logger.info("Use 'gunicorn --config gunicorn.conf.py wsgi:application' for production")
@@ -0,0 +1,64 @@
+"""
+WSGI-to-ASGI adapter for serving the Flask apps under uvicorn
+asgiref's WsgiToAsgi runs every request on one shared thread, so a worker
+would serve a single request at a time; here each request gets its own pool
+thread while async views still run on the server's event loop
+"""
+from concurrent.futures import ThreadPoolExecutor
+from asgiref.sync import sync_to_async
+from asgiref.wsgi import WsgiToAsgi, WsgiToAsgiInstance
+from services.loop_local import mark_server_loop
+
+# Requests in flight per worker; the threads mostly wait on the event loop
+REQUEST_THREADS = 200
+
+_executor = ThreadPoolExecutor(max_workers=REQUEST_THREADS, thread_name_prefix="wsgi")
+
+
+class _ConcurrentWsgiToAsgiInstance(WsgiToAsgiInstance):
+
+    @sync_to_async(thread_sensitive=False, executor=_executor)
+    def run_wsgi_app(self, body):
+        """
+        Run the WSGI app on a pool thread and send its response
+        Follows asgiref's own run_wsgi_app, which runs thread-sensitive and
+        so shares a single thread between all requests
+        """
+        try:
+            environ = self.build_environ(self.scope, body)
+        except ValueError:
+            # Too many duplicate headers
+            self.sync_send({
+                "type": "http.response.start",
+                "status": 400,
+                "headers": [(b"content-type", b"text/plain")],
+            })
+            self.sync_send({"type": "http.response.body", "body": b"Bad Request: Too many duplicate headers"})
+            return
+        bytes_sent = 0
+        for output in self.wsgi_application(environ, self.start_response):
+            if not self.response_started:
+                self.response_started = True
+                self.sync_send(self.response_start)
+            # Never send more than the app's Content-Length allows
+            if self.response_content_length is not None:
+                output = output[:self.response_content_length - bytes_sent]
+            self.sync_send({"type": "http.response.body", "body": output, "more_body": True})
+            bytes_sent += len(output)
+            if bytes_sent == self.response_content_length:
+                break
+        if not self.response_started:
+            self.response_started = True
+            self.sync_send(self.response_start)
+        self.sync_send({"type": "http.response.body"})
+
+
+class ConcurrentWsgiToAsgi(WsgiToAsgi):
+    """WsgiToAsgi that runs requests concurrently instead of one at a time"""
+
+    async def __call__(self, scope, receive, send):
+        # Views run on this loop, so their HTTP clients can stay open
+        mark_server_loop()
+        await _ConcurrentWsgiToAsgiInstance(self.wsgi_application, self.duplicate_header_limit)(
+            scope, receive, send
+        )
@@ -10,10 +10,11 @@ bind = f"0.0.0.0:{os.environ.get('PORT', 5000)}"
 backlog = 2048
 
 # Worker processes
-# Use 2 workers for Replit (limited resources)
-workers = 2
-worker_class = "sync"
-worker_connections = 1000
+# Requests spend most of their time waiting on OpenAI and Spoonacular, so each
+# worker serves the ASGI app (main:asgi_app) on one event loop that multiplexes
+# all of its in-flight requests; one worker per core is enough
+workers = int(os.environ.get("WEB_CONCURRENCY", multiprocessing.cpu_count()))
+worker_class = "uvicorn_worker.UvicornWorker"
 timeout = 120
 keepalive = 2
 
@@ -69,6 +70,10 @@ def pre_fork(server, worker):
 def post_fork(server, worker):
     """Called just after a worker has been forked."""
     server.log.info("Worker spawned (pid: %s)", worker.pid)
+    # Build the OCR processor per worker so HTTP connection pools are not
+    # shared with the master process
+    from app import get_ocr_processor
+    get_ocr_processor()
 
 def post_worker_init(worker):
     """Called just after a worker has initialized the application."""
@@ -1,24 +1,131 @@
 from flask import Flask, request, jsonify
-import requests
+from asgi_adapter import ConcurrentWsgiToAsgi
+import asyncio
+import hashlib
+import json
+import httpx
 import openai
 import re
 import logging
 from typing import List, Dict, Optional, Set
-from dataclasses import dataclass
+from dataclasses import dataclass, replace
 import os
 from functools import wraps
 import time
+from json_provider import OrjsonProvider
+from pydantic import ValidationError
+from schemas import BatchOCRTextRequest, OCRTextRequest, validation_error_body
+from services.cache import LRUCache
+from services.loop_local import LoopLocal, on_server_loop
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 app = Flask(__name__)
+app.json = OrjsonProvider(app)
 
 # Configuration
 SPOONACULAR_API_KEY = os.getenv('SPOONACULAR_API_KEY')
 OPENAI_API_KEY = os.getenv('OPENAI_API_KEY')
-openai.api_key = OPENAI_API_KEY
+
+# Processed results are cached per worker, keyed by a hash of the cleaned text
+RESULT_CACHE_SIZE = 4096
+MIN_CACHE_CONFIDENCE = 0.4
+
+# Recipe ingredient lists are cached per worker, keyed by normalized dish name
+RECIPE_CACHE_SIZE = 2048
+
+# Concurrent pipelines per batch request (each makes up to two Spoonacular calls)
+BATCH_CONCURRENCY = 20
+
+# Async clients pin their connection pools to the event loop that created them
+_http_clients = LoopLocal(lambda: httpx.AsyncClient(timeout=10))
+_openai_clients = LoopLocal(lambda: openai.AsyncOpenAI(api_key=OPENAI_API_KEY))
+
+def _http_client() -> httpx.AsyncClient:
+    return _http_clients.get()
+
+def _openai_client() -> openai.AsyncOpenAI:
+    return _openai_clients.get()
+
+async def aclose_clients():
+    """Close the clients opened on the running event loop, if any"""
+    http_client = _http_clients.pop()
+    if http_client is not None:
+        await http_client.aclose()
+    openai_client = _openai_clients.pop()
+    if openai_client is not None:
+        await openai_client.close()
+
+def closes_loop_clients(view):
+    """Close the view's clients afterwards unless its event loop outlives the request
+    
+    Outside the ASGI server (the Flask dev server, plain WSGI) every async
+    view runs on a fresh event loop, so clients left open would leak.
+    """
+    @wraps(view)
+    async def wrapper(*args, **kwargs):
+        try:
+            return await view(*args, **kwargs)
+        finally:
+            if not on_server_loop():
+                await aclose_clients()
+    return wrapper
+
+# Text cleanup patterns, compiled once at import
+_WS_RE = re.compile(r'\s+')
+
+class _ArtifactTable(dict):
+    """str.translate table that deletes OCR artifacts, filled in lazily"""
+    # Same characters the old [^\w\s\-&,.()'/] pattern kept
+    _KEEP = frozenset("_-&,.()'/")
+    # Only the Basic Multilingual Plane is memoized, which bounds the table at
+    # 64k entries however varied the input; rarer code points are recomputed
+    _MEMO_LIMIT = 0x10000
+    
+    def __missing__(self, codepoint: int):
+        char = chr(codepoint)
+        value = codepoint if char.isalnum() or char.isspace() or char in self._KEEP else None
+        if codepoint < self._MEMO_LIMIT:
+            self[codepoint] = value
+        return value
+
+_ARTIFACT_TABLE = _ArtifactTable()
+_PRICE_RE = re.compile(r'\$?\d+\.?\d*')
+# Stripped content of each non-blank line
+_LINE_RE = re.compile(r'^[^\S\n]*(\S(?:[^\n]*\S)?)', re.MULTILINE)
+
+# Common OCR mistakes. Longer keys are tried first so 'chícken' wins over 'chíck'.
+_OCR_FIXES = {
+    'chícken': 'chicken',
+    'chíck': 'chicken',
+    'beéf': 'beef',
+    'pórk': 'pork',
+    'tómato': 'tomato',
+    'oníon': 'onion',
+    'chése': 'cheese',
+    'chéese': 'cheese'
+}
+_OCR_FIX_RE = re.compile('|'.join(map(re.escape, sorted(_OCR_FIXES, key=len, reverse=True))))
+
+# Common ingredient keywords used when no recipe match is found
+COMMON_INGREDIENTS = frozenset({
+    'chicken', 'beef', 'pork', 'fish', 'salmon', 'tuna', 'shrimp',
+    'rice', 'pasta', 'noodles', 'bread', 'tortilla',
+    'cheese', 'mozzarella', 'cheddar', 'parmesan',
+    'tomato', 'onion', 'garlic', 'pepper', 'mushroom',
+    'lettuce', 'spinach', 'basil', 'cilantro', 'parsley',
+    'oil', 'butter', 'cream', 'milk', 'egg',
+    'salt', 'spice', 'herbs'
+})
+
+# Matches every keyword in one scan. Word boundaries keep 'rice' out of
+# 'price' and 'oil' out of 'boil'; an optional plural suffix still
+# matches 'tomatoes' and 'mushrooms'.
+_INGREDIENT_RE = re.compile(
+    r'\b(' + '|'.join(sorted(COMMON_INGREDIENTS, key=len, reverse=True)) + r')(?:e?s)?\b'
+)
 
 @dataclass
 class IngredientResult:
@@ -37,39 +144,24 @@ class TextProcessor:
     def clean_ocr_text(text: str) -> str:
         """Clean and normalize OCR text"""
         # Remove extra whitespace and normalize
-        text = re.sub(r'\s+', ' ', text.strip())
+        text = _WS_RE.sub(' ', text.strip())
         
         # Remove common OCR artifacts
-        text = re.sub(r'[^\w\s\-&,.()\'/]', '', text)
-        
-        # Fix common OCR mistakes
-        replacements = {
-            'chícken': 'chicken',
-            'chíck': 'chicken',
-            'beéf': 'beef',
-            'pórk': 'pork',
-            'tómato': 'tomato',
-            'oníon': 'onion',
-            'chése': 'cheese',
-            'chéese': 'cheese'
-        }
-        
-        for wrong, correct in replacements.items():
-            text = text.replace(wrong, correct)
+        text = text.translate(_ARTIFACT_TABLE)
         
-        return text
+        # Fix common OCR mistakes in a single pass
+        return _OCR_FIX_RE.sub(lambda m: _OCR_FIXES[m.group(0)], text)
     
     @staticmethod
     def extract_dish_name(text: str) -> str:
         """Extract the most likely dish name from OCR text"""
-        lines = text.split('\n')
-        
-        # Look for the first substantial line that could be a dish name
-        for line in lines:
-            line = line.strip()
+        # Look for the first substantial line that could be a dish name.
+        # Lines are scanned lazily, so the rest of the text is never split.
+        for match in _LINE_RE.finditer(text):
+            line = match.group(1)
             if len(line) > 3 and not line.isdigit():
                 # Remove price patterns
-                line = re.sub(r'\$?\d+\.?\d*', '', line)
+                line = _PRICE_RE.sub('', line)
                 line = line.strip()
                 if line:
                     return line
@@ -80,11 +172,12 @@ class TextProcessor:
 class SpoonacularClient:
     """Handles Spoonacular API interactions"""
     
-    def __init__(self, api_key: str):
+    def __init__(self, api_key: str, cache_size: int = RECIPE_CACHE_SIZE):
         self.api_key = api_key
         self.base_url = "https://api.spoonacular.com"
+        self.recipe_cache = LRUCache(cache_size)
     
-    def search_recipe_by_dish_name(self, dish_name: str) -> Optional[Dict]:
+    async def search_recipe_by_dish_name(self, dish_name: str) -> Optional[Dict]:
         """Search for recipe by dish name"""
         try:
             url = f"{self.base_url}/recipes/complexSearch"
@@ -96,7 +189,7 @@ class SpoonacularClient:
                 'fillIngredients': True
             }
             
-            response = requests.get(url, params=params, timeout=10)
+            response = await _http_client().get(url, params=params)
             response.raise_for_status()
             
             data = response.json()
@@ -105,16 +198,16 @@ class SpoonacularClient:
             return None
             
         except Exception as e:
-            logger.error(f"Spoonacular search error: {e}")
+            logger.error("Spoonacular search error: %s", e)
             return None
     
-    def get_recipe_ingredients(self, recipe_id: int) -> List[str]:
+    async def get_recipe_ingredients(self, recipe_id: int) -> List[str]:
         """Get detailed ingredients for a recipe"""
         try:
             url = f"{self.base_url}/recipes/{recipe_id}/ingredientWidget.json"
             params = {'apiKey': self.api_key}
             
-            response = requests.get(url, params=params, timeout=10)
+            response = await _http_client().get(url, params=params)
             response.raise_for_status()
             
             data = response.json()
@@ -128,19 +221,35 @@ class SpoonacularClient:
             return ingredients
             
         except Exception as e:
-            logger.error(f"Spoonacular ingredients error: {e}")
+            logger.error("Spoonacular ingredients error: %s", e)
             return []
     
-    def analyze_dish_ingredients(self, dish_name: str, ocr_text: str) -> List[str]:
+    async def analyze_dish_ingredients(self, dish_name: str, ocr_text: str) -> List[str]:
         """Analyze dish and return ingredient list"""
+        # Popular dishes recur across menus, so reuse earlier recipe lookups
+        dish_key = dish_name.lower().strip()
+        ingredients = self.recipe_cache.get(dish_key)
+        if ingredients is None:
+            ingredients = await self.find_recipe_ingredients(dish_name)
+            # Empty results may be transient API failures, so only cache hits
+            if ingredients:
+                self.recipe_cache.set(dish_key, ingredients)
+        if ingredients:
+            return ingredients
+        
+        # If no recipe found, try ingredient parsing from OCR text
+        return self.extract_ingredients_from_text(ocr_text)
+    
+    async def find_recipe_ingredients(self, dish_name: str) -> List[str]:
+        """Look up the best matching recipe and return its ingredients"""
         # First, try to find exact recipe match
-        recipe = self.search_recipe_by_dish_name(dish_name)
+        recipe = await self.search_recipe_by_dish_name(dish_name)
         
         if recipe:
             # Get detailed ingredients
             recipe_id = recipe.get('id')
             if recipe_id:
-                ingredients = self.get_recipe_ingredients(recipe_id)
+                ingredients = await self.get_recipe_ingredients(recipe_id)
                 if ingredients:
                     return ingredients
             
@@ -149,145 +258,154 @@ class SpoonacularClient:
             if extended_ingredients:
                 return [ing.get('name', '').strip() for ing in extended_ingredients if ing.get('name')]
         
-        # If no recipe found, try ingredient parsing from OCR text
-        return self.extract_ingredients_from_text(ocr_text)
+        return []
     
     def extract_ingredients_from_text(self, text: str) -> List[str]:
         """Extract potential ingredients from OCR text"""
-        # Common ingredient keywords
-        common_ingredients = {
-            'chicken', 'beef', 'pork', 'fish', 'salmon', 'tuna', 'shrimp',
-            'rice', 'pasta', 'noodles', 'bread', 'tortilla',
-            'cheese', 'mozzarella', 'cheddar', 'parmesan',
-            'tomato', 'onion', 'garlic', 'pepper', 'mushroom',
-            'lettuce', 'spinach', 'basil', 'cilantro', 'parsley',
-            'oil', 'butter', 'cream', 'milk', 'egg',
-            'salt', 'pepper', 'spice', 'herbs'
-        }
-        
-        text_lower = text.lower()
-        found_ingredients = []
-        
-        for ingredient in common_ingredients:
-            if ingredient in text_lower:
-                found_ingredients.append(ingredient)
-        
-        return found_ingredients
+        found_ingredients = {m.group(1) for m in _INGREDIENT_RE.finditer(text.lower())}
+        return sorted(found_ingredients)
+
+# Kept short: prompt tokens add directly to per-call latency
+ENHANCE_SYSTEM_PROMPT = (
+    'You are a culinary expert. Reply in JSON as {"ingredients": [...]} '
+    'with at most 8 simple ingredient names.'
+)
+ENHANCE_PROMPT = (
+    'Dish: {dish_name}\n'
+    'Menu text: {ocr_text}\n'
+    'Known: {ingredients}\n'
+    'List other ingredients this dish usually has but menus omit '
+    '(toppings, garnishes, oils, seasonings, sides).'
+)
 
 class AIEnhancer:
     """Handles ChatGPT integration for ingredient enhancement"""
     
     @staticmethod
-    def enhance_ingredients(dish_name: str, ocr_text: str, 
+    async def enhance_ingredients(dish_name: str, ocr_text: str, 
                           current_ingredients: List[str]) -> List[str]:
         """Use ChatGPT to suggest additional ingredients"""
         try:
             # Prepare the prompt
-            ingredients_str = ", ".join(current_ingredients) if current_ingredients else "None found"
-            
-            prompt = f"""
-Based on the dish name "{dish_name}" and OCR text from a restaurant menu:
-"{ocr_text}"
-
-Current ingredients identified: {ingredients_str}
-
-Please suggest additional common ingredients that are typically found in this dish but might not be explicitly listed. Consider:
-1. Common toppings and garnishes
-2. Base ingredients (oils, seasonings, etc.)
-3. Typical accompaniments
-4. Ingredients that are often assumed/not mentioned
-
-Return only a simple comma-separated list of ingredient names, no explanations.
-Maximum 8 additional ingredients.
-"""
+            ingredients_str = ", ".join(current_ingredients) if current_ingredients else "none"
+            prompt = ENHANCE_PROMPT.format(
+                dish_name=dish_name, ocr_text=ocr_text, ingredients=ingredients_str
+            )
 
-            response = openai.ChatCompletion.create(
+            response = await _openai_client().chat.completions.create(
                 model="gpt-3.5-turbo",
                 messages=[
-                    {"role": "system", "content": "You are a culinary expert helping identify ingredients in restaurant dishes."},
+                    {"role": "system", "content": ENHANCE_SYSTEM_PROMPT},
                     {"role": "user", "content": prompt}
                 ],
-                max_tokens=200,
+                response_format={"type": "json_object"},
+                # Room for eight multi-word names even when the JSON is pretty-printed
+                max_tokens=150,
                 temperature=0.3
             )
             
-            ai_response = response.choices[0].message.content.strip()
+            choice = response.choices[0]
+            if choice.finish_reason == 'length':
+                # A cut-off JSON reply cannot be parsed
+                logger.warning("ChatGPT enhancement reply truncated for %s", dish_name)
+                return []
+            content = choice.message.content or "{}"
             
             # Parse the response
             suggested_ingredients = []
-            for ingredient in ai_response.split(','):
-                ingredient = ingredient.strip().lower()
+            for ingredient in json.loads(content).get('ingredients', []):
+                ingredient = str(ingredient).strip().lower()
                 if ingredient and len(ingredient) > 2:
                     suggested_ingredients.append(ingredient)
             
             return suggested_ingredients[:8]  # Limit to 8 suggestions
             
         except Exception as e:
-            logger.error(f"ChatGPT enhancement error: {e}")
+            logger.error("ChatGPT enhancement error: %s", e)
             return []
 
 class IngredientProcessor:
     """Main processor that orchestrates the entire pipeline"""
     
-    def __init__(self):
+    def __init__(self, cache_size: int = RESULT_CACHE_SIZE):
         self.text_processor = TextProcessor()
         self.spoonacular = SpoonacularClient(SPOONACULAR_API_KEY)
         self.ai_enhancer = AIEnhancer()
+        self.cache = LRUCache(cache_size)
     
-    def process_ocr_text(self, ocr_text: str) -> IngredientResult:
+    async def process_ocr_text(self, ocr_text: str) -> IngredientResult:
         """Process OCR text through the entire pipeline"""
         # Step 1: Clean and process OCR text
         cleaned_text = self.text_processor.clean_ocr_text(ocr_text)
-        dish_name = self.text_processor.extract_dish_name(cleaned_text)
         
-        logger.info(f"Processing dish: {dish_name}")
+        # Identical scans (e.g. client retries) skip the API calls entirely
+        cache_key = hashlib.blake2b(cleaned_text.encode(), digest_size=16).hexdigest()
+        cached = self.cache.get(cache_key)
+        if cached is not None:
+            return replace(cached, original_text=ocr_text)
         
-        # Step 2: Get ingredients from Spoonacular
-        spoonacular_ingredients = self.spoonacular.analyze_dish_ingredients(
-            dish_name, cleaned_text
-        )
+        dish_name = self.text_processor.extract_dish_name(cleaned_text)
+        
+        logger.info("Processing dish: %s", dish_name)
         
-        # Step 3: Enhance with AI suggestions
-        ai_suggested = self.ai_enhancer.enhance_ingredients(
-            dish_name, cleaned_text, spoonacular_ingredients
+        # Steps 2-3: Query Spoonacular and ChatGPT concurrently. The AI call
+        # runs speculatively without the Spoonacular list, so overlap between
+        # the two sources is resolved locally instead of with a second call.
+        spoonacular_ingredients, ai_suggested = await asyncio.gather(
+            self.spoonacular.analyze_dish_ingredients(dish_name, cleaned_text),
+            self.ai_enhancer.enhance_ingredients(dish_name, cleaned_text, [])
         )
+        # Spoonacular names are normalized once and the set is reused for both
+        # the overlap filter and the merge; AI suggestions arrive normalized
+        known = self.normalize_ingredients(spoonacular_ingredients)
+        ai_additions = [ing for ing in ai_suggested if ing not in known]
         
         # Step 4: Combine and deduplicate ingredients
-        final_ingredients = self.combine_ingredients(
-            spoonacular_ingredients, ai_suggested
-        )
+        final_ingredients = sorted(known.union(ai_additions))
         
-        # Step 5: Calculate confidence score
+        # Step 5: Calculate confidence score. A successful AI call counts even
+        # when every suggestion overlapped Spoonacular's list.
         confidence = self.calculate_confidence(
             dish_name, spoonacular_ingredients, ai_suggested
         )
         
-        return IngredientResult(
+        result = IngredientResult(
             original_text=ocr_text,
             dish_name=dish_name,
             spoonacular_ingredients=spoonacular_ingredients,
-            ai_suggested_ingredients=ai_suggested,
+            ai_suggested_ingredients=ai_additions,
             final_ingredients=final_ingredients,
             confidence_score=confidence
         )
-    
-    def combine_ingredients(self, spoonacular_ingredients: List[str], 
-                          ai_suggested: List[str]) -> List[str]:
-        """Combine and deduplicate ingredients from different sources"""
-        combined = set()
         
-        # Add Spoonacular ingredients
-        for ingredient in spoonacular_ingredients:
-            combined.add(ingredient.lower().strip())
+        # Low-confidence results usually mean an upstream API failed; retry those
+        if confidence >= MIN_CACHE_CONFIDENCE:
+            self.cache.set(cache_key, result)
         
-        # Add AI suggested ingredients
-        for ingredient in ai_suggested:
-            combined.add(ingredient.lower().strip())
+        return result
+    
+    async def process_ocr_texts(self, ocr_texts: List[str],
+                                concurrency: int = BATCH_CONCURRENCY) -> List:
+        """Process several OCR texts concurrently
+        
+        Returns one entry per input, in order: an IngredientResult or the
+        exception that text raised.
+        """
+        semaphore = asyncio.Semaphore(concurrency)
         
-        # Remove empty strings and sort
-        final_ingredients = sorted([ing for ing in combined if ing])
+        async def process_one(ocr_text: str) -> IngredientResult:
+            async with semaphore:
+                return await self.process_ocr_text(ocr_text)
         
-        return final_ingredients
+        return await asyncio.gather(
+            *(process_one(text) for text in ocr_texts), return_exceptions=True
+        )
+    
+    @staticmethod
+    def normalize_ingredients(ingredients: List[str]) -> Set[str]:
+        """Lowercase, strip and deduplicate ingredient names, dropping blanks"""
+        normalized = (ing.lower().strip() for ing in ingredients)
+        return {ing for ing in normalized if ing}
     
     def calculate_confidence(self, dish_name: str, 
                            spoonacular_ingredients: List[str],
@@ -309,8 +427,33 @@ class IngredientProcessor:
         
         return min(confidence, 1.0)
 
-# Initialize processor
-processor = IngredientProcessor()
+# Processor is created on first use so a preloading server builds it (and its
+# result cache) in each worker rather than in the parent process
+_processor = None
+
+def get_processor() -> IngredientProcessor:
+    """Return the per-process ingredient processor, creating it on first use"""
+    global _processor
+    if _processor is None:
+        _processor = IngredientProcessor()
+    return _processor
+
+# Serialized /process-ingredients bodies keyed by ETag, served without re-encoding
+_response_cache = LRUCache(RESULT_CACHE_SIZE)
+
+def result_response(result: IngredientResult) -> Dict:
+    """Build the structured response body for a processed OCR text"""
+    return {
+        'success': True,
+        'dish_name': result.dish_name,
+        'ingredients': result.final_ingredients,
+        'confidence_score': result.confidence_score,
+        'details': {
+            'spoonacular_ingredients': result.spoonacular_ingredients,
+            'ai_suggested_ingredients': result.ai_suggested_ingredients,
+            'original_text': result.original_text
+        }
+    }
 
 # API Routes
 @app.route('/health', methods=['GET'])
@@ -324,68 +467,102 @@ def health_check():
     })
 
 @app.route('/process-ingredients', methods=['POST'])
-def process_ingredients():
+@closes_loop_clients
+async def process_ingredients():
     """Main endpoint to process OCR text and return ingredients"""
     try:
         # Validate request
-        if not request.json or 'ocr_text' not in request.json:
-            return jsonify({
-                'error': 'Missing ocr_text in request body'
-            }), 400
-        
-        ocr_text = request.json['ocr_text']
-        
-        if not ocr_text or not ocr_text.strip():
-            return jsonify({
-                'error': 'OCR text cannot be empty'
-            }), 400
+        try:
+            ocr_text = OCRTextRequest.model_validate_json(request.get_data()).ocr_text
+        except ValidationError as e:
+            return jsonify(validation_error_body(e)), 400
+        
+        # The response is addressed by the OCR text, so clients re-posting the
+        # same text can revalidate with If-None-Match. Only stored bodies get
+        # an ETag, so uncached (low-confidence) results are always recomputed.
+        etag = hashlib.blake2b(ocr_text.encode(), digest_size=8).hexdigest()
+        body = _response_cache.get(etag)
+        if body is not None:
+            if request.if_none_match.contains_weak(etag):
+                response = app.response_class(status=304)
+            else:
+                response = app.response_class(body, mimetype='application/json')
+            response.set_etag(etag)
+            return response
         
         # Process the text
-        result = processor.process_ocr_text(ocr_text)
+        result = await get_processor().process_ocr_text(ocr_text)
         
         # Return structured response
-        return jsonify({
-            'success': True,
-            'dish_name': result.dish_name,
-            'ingredients': result.final_ingredients,
-            'confidence_score': result.confidence_score,
-            'details': {
-                'spoonacular_ingredients': result.spoonacular_ingredients,
-                'ai_suggested_ingredients': result.ai_suggested_ingredients,
-                'original_text': result.original_text
-            }
-        })
+        response = jsonify(result_response(result))
+        if result.confidence_score >= MIN_CACHE_CONFIDENCE:
+            response.set_etag(etag)
+            _response_cache.set(etag, response.get_data())
+        return response
         
     except Exception as e:
-        logger.error(f"Processing error: {e}")
+        logger.error("Processing error: %s", e)
         return jsonify({
             'error': 'Internal server error occurred',
             'success': False
         }), 500
 
 @app.route('/process-ingredients/simple', methods=['POST'])
-def process_ingredients_simple():
+@closes_loop_clients
+async def process_ingredients_simple():
     """Simplified endpoint that returns only the ingredient list"""
     try:
-        if not request.json or 'ocr_text' not in request.json:
-            return jsonify({
-                'error': 'Missing ocr_text in request body'
-            }), 400
+        try:
+            ocr_text = OCRTextRequest.model_validate_json(request.get_data()).ocr_text
+        except ValidationError as e:
+            return jsonify(validation_error_body(e)), 400
         
-        ocr_text = request.json['ocr_text']
-        result = processor.process_ocr_text(ocr_text)
+        result = await get_processor().process_ocr_text(ocr_text)
         
         return jsonify({
             'ingredients': result.final_ingredients
         })
         
     except Exception as e:
-        logger.error(f"Simple processing error: {e}")
+        logger.error("Simple processing error: %s", e)
         return jsonify({
             'error': 'Processing failed',
             'ingredients': []
         }), 500
 
+@app.route('/process-ingredients/batch', methods=['POST'])
+@closes_loop_clients
+async def process_ingredients_batch():
+    """Process a list of OCR texts concurrently in one request"""
+    try:
+        try:
+            ocr_texts = BatchOCRTextRequest.model_validate_json(request.get_data()).ocr_texts
+        except ValidationError as e:
+            return jsonify(validation_error_body(e)), 400
+        
+        results = await get_processor().process_ocr_texts(ocr_texts)
+        
+        # A failed text is reported in place without failing the whole batch
+        items = []
+        for result in results:
+            if isinstance(result, BaseException):
+                logger.error("Batch item processing error: %s", result)
+                items.append({'success': False, 'error': 'Processing failed'})
+            else:
+                items.append(result_response(result))
+        
+        return jsonify({
+            'success': True,
+            'results': items
+        })
+        
+    except Exception as e:
+        logger.error("Batch processing error: %s", e)
+        return jsonify({
+            'error': 'Internal server error occurred',
+            'success': False
+        }), 500
+
 @app.errorhandler(404)
 def not_found(error):
     return jsonify({'error': 'Endpoint not found'}), 404
@@ -394,6 +571,9 @@ def not_found(error):
 def internal_error(error):
     return jsonify({'error': 'Internal server error'}), 500
 
+# ASGI entry point: uvicorn ingredients_api:asgi_app
+asgi_app = ConcurrentWsgiToAsgi(app)
+
 if __name__ == '__main__':
     # Validate configuration
     if not SPOONACULAR_API_KEY:
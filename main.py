@@ -1,6 +1,12 @@
 from app import app  # noqa: F401
+from asgi_adapter import ConcurrentWsgiToAsgi
 import os
 
+# ASGI entry point so async views share the server's event loop
+# (uvloop, which uvicorn[standard] installs and uvicorn picks up by default):
+# uvicorn main:asgi_app --workers 2
+asgi_app = ConcurrentWsgiToAsgi(app)
+
 if __name__ == '__main__':
     # Only for development - production uses Gunicorn
     port = int(os.environ.get('PORT', 5000))
@@ -0,0 +1,32 @@
+"""
+Request body schemas for the OCR processing endpoints
+Bodies are validated straight from the raw request bytes by pydantic
+"""
+from typing import Annotated, Dict, List
+from pydantic import BaseModel, Field, StringConstraints, ValidationError
+
+# Upper bound on texts accepted by a single batch request
+MAX_BATCH_SIZE = 50
+
+OCRText = Annotated[str, StringConstraints(strip_whitespace=True, min_length=1)]
+
+
+class OCRTextRequest(BaseModel):
+    """Body of the single-text processing endpoints"""
+    ocr_text: OCRText
+
+
+class BatchOCRTextRequest(BaseModel):
+    """Body of the batch processing endpoint"""
+    ocr_texts: Annotated[List[OCRText], Field(min_length=1, max_length=MAX_BATCH_SIZE)]
+
+
+def validation_error_body(error: ValidationError) -> Dict:
+    """Build a 400 response body from a validation error"""
+    details = error.errors(include_url=False, include_context=False, include_input=False)
+    first = details[0]
+    location = '.'.join(str(part) for part in first['loc'])
+    return {
+        'error': f"{location}: {first['msg']}" if location else first['msg'],
+        'details': details
+    }
@@ -0,0 +1,49 @@
+import asyncio
+import weakref
+from typing import Callable, Generic, Optional, TypeVar
+
+T = TypeVar("T")
+
+# Event loops that outlive a single request (the ASGI server's); clients
+# opened on any other loop are closed when the request that made them ends
+_server_loops = weakref.WeakSet()
+
+def mark_server_loop() -> None:
+    """
+    Record the running event loop as long-lived, so its clients are kept
+    """
+    _server_loops.add(asyncio.get_running_loop())
+
+def on_server_loop() -> bool:
+    """
+    Whether the running event loop was marked long-lived
+    """
+    return asyncio.get_running_loop() in _server_loops
+
+class LoopLocal(Generic[T]):
+    """
+    One value per event loop, created on first use in that loop
+    Async HTTP clients pool connections on the loop that created them, so
+    each loop needs its own. A client with open connections keeps its loop
+    alive, so values of short-lived loops must be popped and closed
+    """
+
+    def __init__(self, factory: Callable[[], T]):
+        self.factory = factory
+        self._values = weakref.WeakKeyDictionary()
+
+    def get(self) -> T:
+        """
+        Value for the running event loop, creating it on first use
+        """
+        loop = asyncio.get_running_loop()
+        value = self._values.get(loop)
+        if value is None:
+            value = self._values[loop] = self.factory()
+        return value
+
+    def pop(self) -> Optional[T]:
+        """
+        Remove and return the value of the running event loop, if any
+        """
+        return self._values.pop(asyncio.get_running_loop(), None)
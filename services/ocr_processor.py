@@ -1,10 +1,85 @@
+import os
+import sys
+import asyncio
 import logging
-from typing import Dict, List
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Dict, FrozenSet, List, Optional
 from .spoonacular import SpoonacularService
 from .openai_service import OpenAIService
 
 logger = logging.getLogger(__name__)
 
+# Dishes whose menu entry already lists this many ingredients skip the
+# Spoonacular lookup and only get ChatGPT suggestions (0 disables the skip)
+MENU_RICHNESS_SKIP_THRESHOLD = int(os.environ.get("MENU_RICHNESS_SKIP_THRESHOLD", 5))
+
+@lru_cache(maxsize=8192)
+def _norm(ingredient: str) -> str:
+    """
+    Normalized ingredient name, interned so the same ingredient shares one
+    string across dishes and requests
+    """
+    return sys.intern(ingredient.lower().strip())
+
+@dataclass(slots=True)
+class DishResult:
+    """Processing result for one menu dish"""
+    dish_name: str
+    from_menu: List[str]
+    from_spoonacular: List[str]
+    verified_spoonacular: List[str]
+    suggested_by_ai: List[str]
+    combined_list: List[str]
+    spoonacular_success: bool = False
+    # Lookup skipped because the menu already lists the ingredients
+    spoonacular_skipped: bool = False
+    openai_success: bool = False
+    spoonacular_confidence: float = 0.0
+    ai_confidence: float = 0.0
+    recipes_found: int = 0
+    ai_reasoning: str = ''
+    error: Optional[str] = None
+    
+    @property
+    def total_ingredients(self) -> int:
+        return len(self.combined_list)
+    
+    def to_dict(self) -> Dict:
+        """
+        Nested dict returned by the API
+        """
+        if self.error is not None:
+            metadata = {
+                'error': self.error,
+                'total_ingredients': self.total_ingredients
+            }
+        else:
+            metadata = {
+                'spoonacular_confidence': self.spoonacular_confidence,
+                'ai_confidence': self.ai_confidence,
+                'recipes_found': self.recipes_found,
+                'ai_reasoning': self.ai_reasoning,
+                'total_ingredients': self.total_ingredients,
+                'sanity_check_performed': self.spoonacular_success
+            }
+        return {
+            'dish_name': self.dish_name,
+            'ingredients': {
+                'from_menu': self.from_menu,
+                'from_spoonacular': self.from_spoonacular,
+                'verified_spoonacular': self.verified_spoonacular,
+                'suggested_by_ai': self.suggested_by_ai,
+                'combined_list': self.combined_list
+            },
+            'metadata': metadata,
+            'sources': {
+                'spoonacular_success': self.spoonacular_success,
+                'spoonacular_skipped': self.spoonacular_skipped,
+                'openai_success': self.openai_success
+            }
+        }
+
 class OCRProcessor:
     """Main processor for OCR text processing workflow"""
     
@@ -13,6 +88,25 @@ class OCRProcessor:
         self.openai = OpenAIService()
     
     def process_ocr_text(self, ocr_text: str) -> Dict:
+        """
+        Main processing pipeline for OCR text, for synchronous callers
+        """
+        async def run() -> Dict:
+            try:
+                return await self.process_ocr_text_async(ocr_text)
+            finally:
+                # The loop is discarded afterwards, so release its connections
+                await self.aclose()
+        
+        return asyncio.run(run())
+    
+    async def aclose(self):
+        """
+        Close the HTTP clients opened on the running event loop
+        """
+        await asyncio.gather(self.spoonacular.aclose(), self.openai.aclose())
+    
+    async def process_ocr_text_async(self, ocr_text: str) -> Dict:
         """
         Main processing pipeline for OCR text
         """
@@ -21,7 +115,7 @@ class OCRProcessor:
             
             # Step 1: Analyze OCR text with ChatGPT to extract dish names
             logger.info("Step 1: Analyzing OCR text with ChatGPT")
-            ocr_analysis = self.openai.analyze_ocr_text(ocr_text)
+            ocr_analysis = await self.openai.analyze_ocr_text(ocr_text)
             
             dishes = ocr_analysis.get('dishes', [])
             if not dishes:
@@ -33,170 +127,194 @@ class OCRProcessor:
                     'dishes': []
                 }
             
-            # Step 2: Process each dish
-            processed_dishes = []
+            # Step 2: Look up recipe ingredients concurrently, once per distinct
+            # dish name; repeated dishes pool their mentioned ingredients
+            pending = []
+            unique = {}
             for dish_data in dishes:
                 dish_name = dish_data.get('name', '').strip()
                 if not dish_name:
                     continue
-                    
-                logger.info(f"Processing dish: {dish_name}")
-                processed_dish = self._process_single_dish(
-                    dish_name, 
-                    dish_data.get('mentioned_ingredients', []),
-                    ocr_text
-                )
-                processed_dishes.append(processed_dish)
+                mentioned_ingredients = dish_data.get('mentioned_ingredients', [])
+                key = dish_name.lower()
+                pending.append((key, dish_name, mentioned_ingredients))
+                dish = unique.get(key)
+                if dish is None:
+                    unique[key] = {'name': dish_name, 'mentioned_ingredients': list(mentioned_ingredients)}
+                else:
+                    dish['mentioned_ingredients'].extend(
+                        ing for ing in mentioned_ingredients if ing not in dish['mentioned_ingredients']
+                    )
+            
+            if len(unique) < len(pending):
+                logger.info("Processing %d distinct dishes out of %d", len(unique), len(pending))
+            
+            lookups = dict(zip(unique, await asyncio.gather(
+                *(self._find_recipe_ingredients(dish['name'], dish['mentioned_ingredients'])
+                  for dish in unique.values()),
+                return_exceptions=True
+            )))
+            
+            # Step 3: Sanity check and suggest ingredients for all dishes in
+            # batched ChatGPT calls rather than two calls per dish
+            found = [key for key, lookup in lookups.items() if not isinstance(lookup, BaseException)]
+            logger.info("Step 3: Checking and suggesting ingredients for %d dishes", len(found))
+            ai_results = dict(zip(found, await self.openai.batch_sanity_and_suggest([
+                {**unique[key], 'recipe_ingredients': lookups[key].get('ingredients', [])}
+                for key in found
+            ], ocr_text)))
+            
+            # Results are built per menu entry so each keeps its own name and mentions
+            processed_dishes = []
+            for key, dish_name, mentioned_ingredients in pending:
+                lookup = lookups[key]
+                if isinstance(lookup, BaseException):
+                    logger.error("Error processing dish '%s': %s", dish_name, lookup)
+                    processed_dishes.append(
+                        self._failed_dish_result(dish_name, mentioned_ingredients, lookup)
+                    )
+                    continue
+                processed_dishes.append(self._build_dish_result(
+                    dish_name, mentioned_ingredients, lookup, ai_results[key]
+                ))
             
-            # Step 3: Compile final results
+            # Step 4: Compile final results
             result = {
                 'success': True,
                 'total_dishes': len(processed_dishes),
                 'ocr_analysis': ocr_analysis,
-                'dishes': processed_dishes,
+                'dishes': [dish.to_dict() for dish in processed_dishes],
                 'processing_summary': self._generate_processing_summary(processed_dishes)
             }
             
-            logger.info(f"OCR processing completed successfully for {len(processed_dishes)} dishes")
+            logger.info("OCR processing completed successfully for %d dishes", len(processed_dishes))
             return result
             
         except Exception as e:
-            logger.error(f"Error in OCR processing: {str(e)}")
+            logger.error("Error in OCR processing: %s", e)
             return {
                 'success': False,
                 'error': str(e),
                 'message': 'An error occurred while processing the OCR text'
             }
     
-    def _process_single_dish(self, dish_name: str, mentioned_ingredients: List[str], 
-                           ocr_text: str) -> Dict:
+    async def _find_recipe_ingredients(self, dish_name: str, mentioned_ingredients: List[str]) -> Dict:
         """
-        Process a single dish through the complete pipeline
+        Get recipe ingredients for a dish from Spoonacular, retrying with a
+        simplified dish name when nothing is found
         """
-        try:
-            # Step 1: Get ingredients from Spoonacular
-            logger.info(f"Getting Spoonacular ingredients for: {dish_name}")
-            spoonacular_result = self.spoonacular.find_ingredients_for_dish(dish_name)
-            
-            # Step 2: If no results, try splitting dish name and retry
-            if not spoonacular_result.get('found_recipes', False):
-                logger.info(f"No recipes found for '{dish_name}', trying to split dish name")
-                split_result = self.openai.split_dish_name(dish_name)
-                if split_result.get('alternative_name'):
-                    logger.info(f"Retrying with alternative name: {split_result['alternative_name']}")
-                    spoonacular_result = self.spoonacular.find_ingredients_for_dish(split_result['alternative_name'])
-            
-            # Step 3: If we have Spoonacular results, perform sanity check
-            verified_ingredients = []
-            if spoonacular_result.get('found_recipes', False):
-                logger.info(f"Performing sanity check on Spoonacular ingredients for: {dish_name}")
-                sanity_check_result = self.openai.sanity_check_ingredients(
-                    dish_name, spoonacular_result.get('ingredients', [])
-                )
-                verified_ingredients = sanity_check_result.get('verified_ingredients', [])
-            
-            # Step 4: Get ChatGPT suggestions for additional ingredients
-            logger.info(f"Getting ChatGPT suggestions for additional ingredients: {dish_name}")
-            additional_result = self.openai.suggest_additional_ingredients(
-                dish_name, verified_ingredients, mentioned_ingredients, ocr_text
-            )
-            
-            # Step 5: Combine all ingredients
-            all_ingredients = self._combine_ingredients(
-                verified_ingredients + [ing.lower() for ing in mentioned_ingredients],
-                additional_result.get('suggested_ingredients', [])
-            )
-            
-            # Step 6: Compile dish result
-            dish_result = {
-                'dish_name': dish_name,
-                'ingredients': {
-                    'from_menu': mentioned_ingredients,
-                    'from_spoonacular': spoonacular_result.get('ingredients', []),
-                    'verified_spoonacular': verified_ingredients,
-                    'suggested_by_ai': additional_result.get('suggested_ingredients', []),
-                    'combined_list': all_ingredients
-                },
-                'metadata': {
-                    'spoonacular_confidence': spoonacular_result.get('confidence', 0.0),
-                    'ai_confidence': additional_result.get('confidence', 0.0),
-                    'recipes_found': spoonacular_result.get('recipe_count', 0),
-                    'ai_reasoning': additional_result.get('reasoning', ''),
-                    'total_ingredients': len(all_ingredients),
-                    'sanity_check_performed': spoonacular_result.get('found_recipes', False)
-                },
-                'sources': {
-                    'spoonacular_success': spoonacular_result.get('found_recipes', False),
-                    'openai_success': 'error' not in additional_result
-                }
-            }
-            
-            return dish_result
-            
-        except Exception as e:
-            logger.error(f"Error processing dish '{dish_name}': {str(e)}")
+        if MENU_RICHNESS_SKIP_THRESHOLD and len(mentioned_ingredients) >= MENU_RICHNESS_SKIP_THRESHOLD:
+            logger.info("Menu lists %d ingredients for '%s', skipping Spoonacular",
+                        len(mentioned_ingredients), dish_name)
             return {
                 'dish_name': dish_name,
-                'ingredients': {
-                    'from_menu': mentioned_ingredients,
-                    'from_spoonacular': [],
-                    'verified_spoonacular': [],
-                    'suggested_by_ai': [],
-                    'combined_list': mentioned_ingredients
-                },
-                'metadata': {
-                    'error': str(e),
-                    'total_ingredients': len(mentioned_ingredients)
-                },
-                'sources': {
-                    'spoonacular_success': False,
-                    'openai_success': False
-                }
+                'ingredients': [],
+                'source': 'menu',
+                'found_recipes': False,
+                'skipped': True,
+                'recipe_count': 0
             }
+        
+        logger.info("Getting Spoonacular ingredients for: %s", dish_name)
+        spoonacular_result = await self.spoonacular.find_ingredients_for_dish(dish_name)
+        
+        if not spoonacular_result.get('found_recipes', False):
+            logger.info("No recipes found for '%s', trying to split dish name", dish_name)
+            split_result = await self.openai.split_dish_name(dish_name)
+            alternative_name = split_result.get('alternative_name')
+            # An unchanged name would just repeat the search that found nothing
+            if alternative_name and _norm(alternative_name) != _norm(dish_name):
+                logger.info("Retrying with alternative name: %s", alternative_name)
+                spoonacular_result = await self.spoonacular.find_ingredients_for_dish(alternative_name)
+        
+        return spoonacular_result
     
-    def _combine_ingredients(self, known_ingredients: List[str], 
-                           suggested_ingredients: List[str]) -> List[str]:
+    def _build_dish_result(self, dish_name: str, mentioned_ingredients: List[str],
+                           spoonacular_result: Dict, ai_result: Dict) -> DishResult:
         """
-        Combine and deduplicate ingredients from different sources
+        Combine the recipe lookup and the batched ChatGPT result for one dish
         """
-        # Convert to lowercase for comparison
-        combined = set()
-        
-        # Add known ingredients
-        for ingredient in known_ingredients:
-            combined.add(ingredient.lower().strip())
+        found_recipes = spoonacular_result.get('found_recipes', False)
+        verified_ingredients = ai_result.get('verified_ingredients', []) if found_recipes else []
+        mentioned_set = frozenset(_norm(ing) for ing in mentioned_ingredients)
+        # Suggestions the sanity check removed, or that the menu already lists, are dropped
+        excluded = mentioned_set.union(_norm(ing) for ing in ai_result.get('removed_ingredients', []))
+        suggested_ingredients = [
+            ing for ing in ai_result.get('suggested_ingredients', [])
+            if _norm(ing) not in excluded
+        ]
         
-        # Add suggested ingredients (avoid duplicates)
-        for ingredient in suggested_ingredients:
-            cleaned = ingredient.lower().strip()
-            if cleaned and cleaned not in combined:
-                combined.add(cleaned)
+        all_ingredients = self._combine_ingredients(
+            mentioned_set, verified_ingredients, suggested_ingredients
+        )
         
-        # Return sorted list
-        return sorted(list(combined))
+        return DishResult(
+            dish_name=dish_name,
+            from_menu=mentioned_ingredients,
+            from_spoonacular=spoonacular_result.get('ingredients', []),
+            verified_spoonacular=verified_ingredients,
+            suggested_by_ai=suggested_ingredients,
+            combined_list=all_ingredients,
+            spoonacular_success=found_recipes,
+            spoonacular_skipped=spoonacular_result.get('skipped', False),
+            openai_success='error' not in ai_result,
+            spoonacular_confidence=spoonacular_result.get('confidence', 0.0),
+            ai_confidence=ai_result.get('confidence', 0.0),
+            recipes_found=spoonacular_result.get('recipe_count', 0),
+            ai_reasoning=ai_result.get('reasoning', '')
+        )
+    
+    def _failed_dish_result(self, dish_name: str, mentioned_ingredients: List[str],
+                            error: BaseException) -> DishResult:
+        """
+        Build the result for a dish whose processing failed
+        """
+        return DishResult(
+            dish_name=dish_name,
+            from_menu=mentioned_ingredients,
+            from_spoonacular=[],
+            verified_spoonacular=[],
+            suggested_by_ai=[],
+            combined_list=mentioned_ingredients,
+            error=str(error)
+        )
+    
+    def _combine_ingredients(self, mentioned_set: FrozenSet[str], verified_ingredients: List[str],
+                             suggested_ingredients: List[str]) -> List[str]:
+        """
+        Combine and deduplicate ingredients from different sources
+        mentioned_set is already normalized
+        """
+        combined = {*mentioned_set, *map(_norm, verified_ingredients), *map(_norm, suggested_ingredients)}
+        combined.discard('')
+        return sorted(combined)
     
-    def _generate_processing_summary(self, dishes: List[Dict]) -> Dict:
+    def _generate_processing_summary(self, dishes: List[DishResult]) -> Dict:
         """
         Generate summary statistics for the processing
         """
         try:
             total_dishes = len(dishes)
-            spoonacular_successes = sum(1 for d in dishes if d.get('sources', {}).get('spoonacular_success', False))
-            openai_successes = sum(1 for d in dishes if d.get('sources', {}).get('openai_success', False))
+            spoonacular_successes = sum(1 for d in dishes if d.spoonacular_success)
+            # Skipped dishes never queried Spoonacular, so they do not count against it
+            spoonacular_skipped = sum(1 for d in dishes if d.spoonacular_skipped)
+            spoonacular_queried = total_dishes - spoonacular_skipped
+            openai_successes = sum(1 for d in dishes if d.openai_success)
             
-            total_ingredients = sum(d.get('metadata', {}).get('total_ingredients', 0) for d in dishes)
+            total_ingredients = sum(d.total_ingredients for d in dishes)
             avg_ingredients = total_ingredients / total_dishes if total_dishes > 0 else 0
             
             return {
                 'total_dishes_processed': total_dishes,
-                'spoonacular_success_rate': spoonacular_successes / total_dishes if total_dishes > 0 else 0,
+                'spoonacular_success_rate': spoonacular_successes / spoonacular_queried if spoonacular_queried > 0 else 0,
+                'spoonacular_skipped': spoonacular_skipped,
                 'openai_success_rate': openai_successes / total_dishes if total_dishes > 0 else 0,
                 'total_ingredients_found': total_ingredients,
                 'average_ingredients_per_dish': round(avg_ingredients, 1)
             }
             
         except Exception as e:
-            logger.error(f"Error generating processing summary: {str(e)}")
+            logger.error("Error generating processing summary: %s", e)
             return {
                 'error': str(e)
             }
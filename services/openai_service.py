@@ -1,23 +1,108 @@
 import os
-import json
+import orjson
+import asyncio
+import functools
 import logging
-from typing import Dict, List
-from openai import OpenAI
+from typing import Dict, List, Type, TypeVar
+from openai import AsyncOpenAI
+from pydantic import BaseModel
+from .cache import LRUCache
+from .loop_local import LoopLocal
+from .prompts import ANALYZE_SYSTEM, SANITY_SUGGEST_SYSTEM, SPLIT_SYSTEM, SUGGEST_MISSING_SYSTEM
+from .schemas import BatchIngredientCheck, DishNameSplit, MissingIngredientSuggestions, OCRAnalysis
 
 logger = logging.getLogger(__name__)
 
+ResponseModel = TypeVar("ResponseModel", bound=BaseModel)
+
+# Successful dish-level responses kept per worker; common dishes recur across menus
+RESPONSE_CACHE_SIZE = 4096
+
+# Dishes per batched sanity check / suggestion request, and the output budget
+# each dish adds to it (gpt-4o caps completions just above 16k tokens)
+SANITY_SUGGEST_BATCH_SIZE = 10
+BATCH_TOKENS_PER_DISH = 1000
+MAX_BATCH_TOKENS = 16000
+
+# Rate limited (429), timed out and 5xx requests are retried by the SDK with
+# exponential backoff that honors Retry-After; requests in flight per event
+# loop are capped so a large menu does not trip the rate limit to begin with
+MAX_RETRIES = 5
+MAX_CONCURRENT_REQUESTS = 20
+
+def _user_message(**fields) -> str:
+    """Per-request data for the user message, sent after the fixed system prompt"""
+    return orjson.dumps(fields).decode()
+
+def _normalize(text: str) -> str:
+    return text.lower().strip()
+
+def _ingredients_key(ingredients: List[str]) -> frozenset:
+    return frozenset(_normalize(ingredient) for ingredient in ingredients)
+
+def cached_response(make_key):
+    """
+    Serve repeated calls of an OpenAIService method from its response cache.
+    make_key receives the call arguments and returns the dish-level cache key.
+    Error responses are not cached so they are retried on the next call.
+    """
+    def decorator(method):
+        @functools.wraps(method)
+        async def wrapper(self, *args, **kwargs):
+            key = (method.__name__, make_key(*args, **kwargs))
+            result = self.response_cache.get(key)
+            if result is None:
+                result = await method(self, *args, **kwargs)
+                if 'error' not in result:
+                    self.response_cache.set(key, result)
+            return result
+        return wrapper
+    return decorator
+
 class OpenAIService:
     """Service for interacting with OpenAI API"""
     
     def __init__(self):
         self.api_key = os.environ.get("OPENAI_API_KEY", "default_key")
-        self.client = OpenAI(api_key=self.api_key)
+        self._clients = LoopLocal(lambda: AsyncOpenAI(api_key=self.api_key, max_retries=MAX_RETRIES))
+        self._semaphores = LoopLocal(lambda: asyncio.Semaphore(MAX_CONCURRENT_REQUESTS))
         # the newest OpenAI model is "gpt-4o" which was released May 13, 2024.
         # do not change this unless explicitly requested by the user
         self.model = "gpt-4o"
+        self.response_cache = LRUCache(RESPONSE_CACHE_SIZE)
+    
+    @property
+    def client(self) -> AsyncOpenAI:
+        """
+        OpenAI client for the running event loop
+        """
+        return self._clients.get()
+    
+    async def _parse(self, response_format: Type[ResponseModel], **kwargs) -> ResponseModel:
+        """
+        Create a chat completion constrained to and parsed into response_format,
+        waiting for a free request slot first
+        """
+        async with self._semaphores.get():
+            response = await self.client.beta.chat.completions.parse(
+                response_format=response_format, **kwargs
+            )
+        message = response.choices[0].message
+        if message.parsed is None:
+            raise ValueError(message.refusal or "Empty response")
+        return message.parsed
+    
+    async def aclose(self):
+        """
+        Close the client of the running event loop, if one was opened
+        """
+        self._semaphores.pop()
+        client = self._clients.pop()
+        if client is not None:
+            await client.close()
         
-    def suggest_missing_ingredients(self, dish_name: str, known_ingredients: List[str], 
-                                   ocr_text: str = "") -> Dict:
+    async def suggest_missing_ingredients(self, dish_name: str, known_ingredients: List[str], 
+                                         ocr_text: str = "") -> Dict:
         """
         Use ChatGPT to suggest missing ingredients for a dish
         """
@@ -27,49 +112,38 @@ class OpenAIService:
                 dish_name, known_ingredients, ocr_text
             )
             
-            logger.info(f"Requesting ingredient suggestions for: {dish_name}")
+            logger.info("Requesting ingredient suggestions for: %s", dish_name)
             
-            response = self.client.chat.completions.create(
+            result = await self._parse(
+                MissingIngredientSuggestions,
                 model=self.model,
                 messages=[
                     {
                         "role": "system",
-                        "content": "You are a culinary expert specializing in restaurant dishes and ingredients. "
-                                 "Analyze dish names and known ingredients to suggest commonly missing ingredients "
-                                 "such as toppings, garnishes, seasonings, and components often omitted from menus. "
-                                 "Respond with JSON in the specified format."
+                        "content": SUGGEST_MISSING_SYSTEM
                     },
                     {
                         "role": "user",
                         "content": prompt
                     }
                 ],
-                response_format={"type": "json_object"},
                 temperature=0.3,
                 max_tokens=1500
             )
             
-            content = response.choices[0].message.content or "{}"
-            result = json.loads(content)
-            
-            # Validate and clean the response
-            suggested_ingredients = result.get('suggested_ingredients', [])
-            reasoning = result.get('reasoning', '')
-            confidence = result.get('confidence', 0.5)
-            
-            logger.info(f"ChatGPT suggested {len(suggested_ingredients)} additional ingredients")
+            logger.info("ChatGPT suggested %d additional ingredients", len(result.suggested_ingredients))
             
             return {
                 'dish_name': dish_name,
-                'suggested_ingredients': suggested_ingredients,
-                'reasoning': reasoning,
-                'confidence': max(0.0, min(1.0, confidence)),
+                'suggested_ingredients': result.suggested_ingredients,
+                'reasoning': result.reasoning,
+                'confidence': max(0.0, min(1.0, result.confidence)),
                 'source': 'openai',
                 'model': self.model
             }
             
         except Exception as e:
-            logger.error(f"Error getting ingredient suggestions: {str(e)}")
+            logger.error("Error getting ingredient suggestions: %s", e)
             return {
                 'dish_name': dish_name,
                 'suggested_ingredients': [],
@@ -84,109 +158,42 @@ class OpenAIService:
         """
         Build the prompt for ingredient suggestion
         """
-        prompt = f"""
-Analyze this restaurant dish and suggest missing ingredients:
-
-Dish Name: {dish_name}
-
-Known Ingredients (from recipe database):
-{', '.join(known_ingredients) if known_ingredients else 'None found'}
-
-Original OCR Text (may contain additional clues):
-{ocr_text}
-
-IMPORTANT: First, perform a sanity check on the recipe database ingredients:
-1. Do the listed ingredients actually make sense for this dish?
-2. Are there any obviously incorrect or unrelated ingredients?
-3. Are the ingredients appropriate for the cooking style/cuisine?
-
-Then, suggest common ingredients that are likely missing from the known ingredients list. Focus on:
-1. Common toppings and garnishes
-2. Seasonings and spices typically used
-3. Cooking ingredients often omitted from menus
-4. Preparation components (oils, vinegars, etc.)
-5. Side accompaniments commonly served with this dish
-
-Consider the restaurant context and typical preparation methods.
-
-Respond with JSON in this exact format:
-{{
-  "sanity_check": {{
-    "recipe_ingredients_valid": true/false,
-    "issues_found": ["list any problematic ingredients from the database"],
-    "corrected_ingredients": ["list of ingredients that should replace invalid ones"]
-  }},
-  "suggested_ingredients": ["ingredient1", "ingredient2", ...],
-  "reasoning": "Brief explanation of why these ingredients are likely included",
-  "confidence": 0.8
-}}
-
-Keep ingredients as simple names (e.g., "olive oil", "garlic", "parsley").
-Confidence should be between 0.0 and 1.0.
-"""
-        return prompt
+        return _user_message(
+            dish_name=dish_name,
+            known_ingredients=known_ingredients,
+            ocr_text=ocr_text
+        )
     
-    def analyze_ocr_text(self, ocr_text: str) -> Dict:
+    async def analyze_ocr_text(self, ocr_text: str) -> Dict:
         """
         Analyze OCR text to extract dish names and potential ingredients
         """
         try:
-            prompt = f"""
-Analyze this OCR text from a restaurant menu and extract dish names and any ingredients mentioned:
-
-OCR Text:
-{ocr_text}
-
-Extract and structure the information. Look for:
-1. Dish/menu item names
-2. Any ingredients explicitly mentioned
-3. Cooking methods or preparation styles
-4. Potential allergen information
-
-Respond with JSON in this exact format:
-{{
-  "dishes": [
-    {{
-      "name": "dish name",
-      "mentioned_ingredients": ["ingredient1", "ingredient2"],
-      "cooking_method": "method if mentioned",
-      "confidence": 0.9
-    }}
-  ],
-  "overall_confidence": 0.8,
-  "text_quality": "good/fair/poor"
-}}
-"""
-            
             logger.info("Analyzing OCR text with ChatGPT")
             
-            response = self.client.chat.completions.create(
+            result = await self._parse(
+                OCRAnalysis,
                 model=self.model,
                 messages=[
                     {
                         "role": "system",
-                        "content": "You are an expert at analyzing restaurant menu text and extracting dish information. "
-                                 "Focus on identifying complete dish names and any ingredients explicitly mentioned."
+                        "content": ANALYZE_SYSTEM
                     },
                     {
                         "role": "user",
-                        "content": prompt
+                        "content": ocr_text
                     }
                 ],
-                response_format={"type": "json_object"},
                 temperature=0.2,
                 max_tokens=1000
             )
             
-            content = response.choices[0].message.content or "{}"
-            result = json.loads(content)
-            
-            logger.info(f"OCR analysis found {len(result.get('dishes', []))} dishes")
+            logger.info("OCR analysis found %d dishes", len(result.dishes))
             
-            return result
+            return result.model_dump()
             
         except Exception as e:
-            logger.error(f"Error analyzing OCR text: {str(e)}")
+            logger.error("Error analyzing OCR text: %s", e)
             return {
                 'dishes': [],
                 'overall_confidence': 0.0,
@@ -194,59 +201,37 @@ Respond with JSON in this exact format:
                 'error': str(e)
             }
     
-    def split_dish_name(self, dish_name: str) -> Dict:
+    @cached_response(lambda dish_name: _normalize(dish_name))
+    async def split_dish_name(self, dish_name: str) -> Dict:
         """
         Split dish name into simpler components for better Spoonacular search
         """
         try:
-            prompt = f"""
-Analyze this dish name and provide a simpler, more searchable alternative:
-
-Dish Name: {dish_name}
-
-The goal is to create a simplified version that would have better results in a recipe database search.
-For example:
-- "Grandma's Famous Chocolate Chip Cookies" → "Chocolate Chip Cookies"
-- "BBQ Bacon Cheeseburger Deluxe" → "BBQ Bacon Cheeseburger"
-- "Traditional Italian Margherita Pizza" → "Margherita Pizza"
-
-Respond with JSON in this exact format:
-{{
-  "original_name": "{dish_name}",
-  "alternative_name": "simplified name",
-  "reasoning": "Brief explanation of the simplification"
-}}
-"""
+            logger.info("Splitting dish name: %s", dish_name)
             
-            logger.info(f"Splitting dish name: {dish_name}")
-            
-            response = self.client.chat.completions.create(
+            result = await self._parse(
+                DishNameSplit,
                 model=self.model,
                 messages=[
                     {
                         "role": "system",
-                        "content": "You are an expert at simplifying dish names for recipe database searches. "
-                                 "Focus on removing descriptive adjectives while keeping the core dish identity."
+                        "content": SPLIT_SYSTEM
                     },
                     {
                         "role": "user",
-                        "content": prompt
+                        "content": dish_name
                     }
                 ],
-                response_format={"type": "json_object"},
                 temperature=0.2,
                 max_tokens=500
             )
             
-            content = response.choices[0].message.content or "{}"
-            result = json.loads(content)
+            logger.info("Split result: %s", result.alternative_name or 'No alternative found')
             
-            logger.info(f"Split result: {result.get('alternative_name', 'No alternative found')}")
-            
-            return result
+            return result.model_dump()
             
         except Exception as e:
-            logger.error(f"Error splitting dish name: {str(e)}")
+            logger.error("Error splitting dish name: %s", e)
             return {
                 'original_name': dish_name,
                 'alternative_name': None,
@@ -254,155 +239,119 @@ Respond with JSON in this exact format:
                 'error': str(e)
             }
     
-    def sanity_check_ingredients(self, dish_name: str, ingredients: List[str]) -> Dict:
+    async def batch_sanity_and_suggest(self, dishes: List[Dict], ocr_text: str) -> List[Dict]:
         """
-        Perform sanity check on ingredients from recipe database
+        Sanity check recipe ingredients and suggest additional ingredients for
+        several dishes with one request per batch instead of two per dish
+        Each dish is a dict with name, recipe_ingredients and mentioned_ingredients;
+        results are returned in the same order
         """
-        try:
-            prompt = f"""
-Perform a sanity check on these ingredients for the dish:
-
-Dish Name: {dish_name}
-
-Ingredients from recipe database:
-{', '.join(ingredients)}
-
-Analyze if these ingredients make sense for this dish:
-1. Are any ingredients completely unrelated to this dish?
-2. Are there any obvious mistakes or incorrect ingredients?
-3. Are all ingredients appropriate for the cooking style/cuisine?
-
-Remove any ingredients that don't belong and provide the verified list.
-
-Respond with JSON in this exact format:
-{{
-  "verified_ingredients": ["ingredient1", "ingredient2", ...],
-  "removed_ingredients": ["removed1", "removed2", ...],
-  "reasoning": "Brief explanation of what was removed and why"
-}}
-"""
-            
-            logger.info(f"Sanity checking ingredients for: {dish_name}")
-            
-            response = self.client.chat.completions.create(
-                model=self.model,
-                messages=[
-                    {
-                        "role": "system",
-                        "content": "You are a culinary expert performing quality control on recipe ingredients. "
-                                 "Remove any ingredients that are clearly inappropriate or unrelated to the dish."
-                    },
-                    {
-                        "role": "user",
-                        "content": prompt
-                    }
-                ],
-                response_format={"type": "json_object"},
-                temperature=0.2,
-                max_tokens=800
+        results = [None] * len(dishes)
+        pending = []
+        for index, dish in enumerate(dishes):
+            key = (
+                'batch_sanity_and_suggest',
+                _normalize(dish['name']),
+                _ingredients_key(dish['recipe_ingredients']),
+                _ingredients_key(dish['mentioned_ingredients'])
             )
-            
-            content = response.choices[0].message.content or "{}"
-            result = json.loads(content)
-            
-            verified_ingredients = result.get('verified_ingredients', ingredients)
-            removed_count = len(result.get('removed_ingredients', []))
-            
-            logger.info(f"Sanity check complete: {len(verified_ingredients)} verified, {removed_count} removed")
-            
-            return result
-            
-        except Exception as e:
-            logger.error(f"Error in sanity check: {str(e)}")
-            return {
-                'verified_ingredients': ingredients,
-                'removed_ingredients': [],
-                'reasoning': f'Error during sanity check: {str(e)}',
-                'error': str(e)
-            }
+            cached = self.response_cache.get(key)
+            if cached is None:
+                pending.append((index, key, dish))
+            else:
+                results[index] = cached
+        
+        batches = [
+            pending[start:start + SANITY_SUGGEST_BATCH_SIZE]
+            for start in range(0, len(pending), SANITY_SUGGEST_BATCH_SIZE)
+        ]
+        batch_results = await asyncio.gather(*(
+            self._sanity_and_suggest_batch([dish for _, _, dish in batch], ocr_text)
+            for batch in batches
+        ))
+        
+        for batch, batch_result in zip(batches, batch_results):
+            for (index, key, _), result in zip(batch, batch_result):
+                if 'error' not in result:
+                    self.response_cache.set(key, result)
+                results[index] = result
+        
+        return results
     
-    def suggest_additional_ingredients(self, dish_name: str, verified_ingredients: List[str], 
-                                     mentioned_ingredients: List[str], ocr_text: str) -> Dict:
+    async def _sanity_and_suggest_batch(self, dishes: List[Dict], ocr_text: str) -> List[Dict]:
         """
-        Suggest additional ingredients that are commonly missing
+        Run one batched sanity check / suggestion request
         """
         try:
-            prompt = f"""
-Suggest additional ingredients for this dish that are commonly missing from menus:
-
-Dish Name: {dish_name}
-
-Verified ingredients from recipe database:
-{', '.join(verified_ingredients) if verified_ingredients else 'None'}
-
-Ingredients mentioned in menu:
-{', '.join(mentioned_ingredients) if mentioned_ingredients else 'None'}
-
-Original OCR text (context):
-{ocr_text}
-
-Focus on suggesting ingredients that are:
-1. Common toppings and garnishes
-2. Base ingredients (oils, seasonings, etc.)
-3. Typical accompaniments
-4. Ingredients that are often assumed/not mentioned
-
-Avoid suggesting ingredients that are already in the verified list.
-
-Respond with JSON in this exact format:
-{{
-  "suggested_ingredients": ["ingredient1", "ingredient2", ...],
-  "reasoning": "Brief explanation of why these ingredients are commonly included",
-  "confidence": 0.8
-}}
-
-Keep ingredients as simple names (e.g., "olive oil", "garlic", "parsley").
-Confidence should be between 0.0 and 1.0.
-"""
+            prompt = _user_message(
+                dishes=[
+                    {
+                        'id': dish_id,
+                        'name': dish['name'],
+                        'recipe_ingredients': dish['recipe_ingredients'],
+                        'mentioned_ingredients': dish['mentioned_ingredients']
+                    }
+                    for dish_id, dish in enumerate(dishes)
+                ],
+                ocr_text=ocr_text
+            )
             
-            logger.info(f"Suggesting additional ingredients for: {dish_name}")
+            logger.info("Sanity checking and suggesting ingredients for %d dishes", len(dishes))
             
-            response = self.client.chat.completions.create(
+            result = await self._parse(
+                BatchIngredientCheck,
                 model=self.model,
                 messages=[
                     {
                         "role": "system",
-                        "content": "You are a culinary expert specializing in identifying commonly omitted ingredients. "
-                                 "Focus on ingredients that restaurants typically use but don't list on menus."
+                        "content": SANITY_SUGGEST_SYSTEM
                     },
                     {
                         "role": "user",
                         "content": prompt
                     }
                 ],
-                response_format={"type": "json_object"},
-                temperature=0.3,
-                max_tokens=1000
+                temperature=0.2,
+                max_tokens=min(MAX_BATCH_TOKENS, BATCH_TOKENS_PER_DISH * len(dishes))
             )
             
-            content = response.choices[0].message.content or "{}"
-            result = json.loads(content)
+            entries = {entry.id: entry for entry in result.dishes}
             
-            suggested_ingredients = result.get('suggested_ingredients', [])
-            reasoning = result.get('reasoning', '')
-            confidence = result.get('confidence', 0.5)
+            results = []
+            for dish_id, dish in enumerate(dishes):
+                entry = entries.get(dish_id)
+                if entry is None:
+                    results.append(self._failed_batch_entry(dish, 'Dish missing from batched response'))
+                    continue
+                results.append({
+                    'verified_ingredients': entry.verified_ingredients,
+                    'removed_ingredients': entry.removed_ingredients,
+                    'suggested_ingredients': entry.suggested_ingredients,
+                    'reasoning': entry.reasoning,
+                    'confidence': max(0.0, min(1.0, entry.confidence)),
+                    'source': 'openai',
+                    'model': self.model
+                })
             
-            logger.info(f"Suggested {len(suggested_ingredients)} additional ingredients")
+            logger.info("Batched sanity check complete for %d of %d dishes", len(entries), len(dishes))
             
-            return {
-                'suggested_ingredients': suggested_ingredients,
-                'reasoning': reasoning,
-                'confidence': max(0.0, min(1.0, confidence)),
-                'source': 'openai',
-                'model': self.model
-            }
+            return results
             
         except Exception as e:
-            logger.error(f"Error suggesting additional ingredients: {str(e)}")
-            return {
-                'suggested_ingredients': [],
-                'reasoning': f'Error: {str(e)}',
-                'confidence': 0.0,
-                'source': 'openai',
-                'error': str(e)
-            }
+            logger.error("Error in batched sanity check and suggestions: %s", e)
+            return [self._failed_batch_entry(dish, str(e)) for dish in dishes]
+    
+    def _failed_batch_entry(self, dish: Dict, error: str) -> Dict:
+        """
+        Result for a dish the batched request could not handle; keeps the
+        recipe ingredients unverified rather than dropping them
+        """
+        return {
+            'verified_ingredients': dish['recipe_ingredients'],
+            'removed_ingredients': [],
+            'suggested_ingredients': [],
+            'reasoning': f'Error: {error}',
+            'confidence': 0.0,
+            'source': 'openai',
+            'error': error
+        }
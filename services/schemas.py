@@ -0,0 +1,54 @@
+"""
+Response schemas for the OpenAI requests
+Passed as structured output formats, so replies are constrained to these
+shapes and parsed by the SDK; fields have no defaults because structured
+outputs require every field
+"""
+from typing import List, Optional
+from pydantic import BaseModel
+
+
+class DishExtract(BaseModel):
+    name: str
+    mentioned_ingredients: List[str]
+    cooking_method: str
+    confidence: float
+
+
+class OCRAnalysis(BaseModel):
+    dishes: List[DishExtract]
+    overall_confidence: float
+    text_quality: str
+
+
+class DishNameSplit(BaseModel):
+    original_name: str
+    # Required but nullable: null when there is no simpler name
+    alternative_name: Optional[str]
+    reasoning: str
+
+
+class RecipeIngredientCheck(BaseModel):
+    recipe_ingredients_valid: bool
+    issues_found: List[str]
+    corrected_ingredients: List[str]
+
+
+class MissingIngredientSuggestions(BaseModel):
+    sanity_check: RecipeIngredientCheck
+    suggested_ingredients: List[str]
+    reasoning: str
+    confidence: float
+
+
+class DishIngredientCheck(BaseModel):
+    id: int
+    verified_ingredients: List[str]
+    removed_ingredients: List[str]
+    suggested_ingredients: List[str]
+    reasoning: str
+    confidence: float
+
+
+class BatchIngredientCheck(BaseModel):
+    dishes: List[DishIngredientCheck]
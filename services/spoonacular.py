@@ -1,24 +1,109 @@
 import os
-import requests
+import sys
+import asyncio
+import httpx
+import orjson
 import logging
-from typing import Dict, List, Optional
+import diskcache
+import tempfile
+from typing import Dict, List, Optional, Tuple
+from .loop_local import LoopLocal
 
 logger = logging.getLogger(__name__)
 
+# Short retry on rate limiting and transient server errors
+RETRY_STATUSES = frozenset({429, 500, 502, 503, 504})
+MAX_RETRIES = 2
+RETRY_BACKOFF = 0.2
+
+# Recipe lookups are shared through a local disk cache by all workers on a host.
+# The default directory is private to the user running the app, and entries
+# are stored as JSON so nothing read back from disk is unpickled
+CACHE_DIR = os.environ.get(
+    "SPOONACULAR_CACHE_DIR",
+    os.path.join(tempfile.gettempdir(), f"restaurant-ingredient-api-spoonacular-{os.getuid()}")
+)
+CACHE_TTL = 24 * 60 * 60
+
 class SpoonacularService:
     """Service for interacting with Spoonacular API"""
     
     def __init__(self):
         self.api_key = os.environ.get("SPOONACULAR_API_KEY", "default_key")
         self.base_url = "https://api.spoonacular.com"
-        self.session = requests.Session()
+        self._clients = LoopLocal(self._new_client)
+        os.makedirs(CACHE_DIR, mode=0o700, exist_ok=True)
+        self.cache = diskcache.Cache(CACHE_DIR, disk=diskcache.JSONDisk)
+    
+    def _new_client(self) -> httpx.AsyncClient:
+        """
+        HTTP/2 keep-alive client, so concurrent lookups share one connection
+        """
+        return httpx.AsyncClient(
+            base_url=self.base_url,
+            timeout=10.0,
+            transport=httpx.AsyncHTTPTransport(
+                http2=True,
+                limits=httpx.Limits(max_connections=100, max_keepalive_connections=20),
+                retries=MAX_RETRIES
+            )
+        )
+    
+    @property
+    def client(self) -> httpx.AsyncClient:
+        """
+        Client for the running event loop
+        """
+        return self._clients.get()
+    
+    async def aclose(self):
+        """
+        Close the client of the running event loop, if one was opened
+        """
+        client = self._clients.pop()
+        if client is not None:
+            await client.aclose()
+    
+    async def _get(self, endpoint: str, params: Dict) -> httpx.Response:
+        """
+        GET an endpoint, retrying rate limited and transient server errors
+        """
+        for attempt in range(MAX_RETRIES + 1):
+            response = await self.client.get(endpoint, params=params)
+            if response.status_code not in RETRY_STATUSES or attempt == MAX_RETRIES:
+                return response
+            await asyncio.sleep(RETRY_BACKOFF * 2 ** attempt)
+    
+    async def _cache_get(self, key) -> Optional[Dict]:
+        """
+        Cached lookup result, or None if missing or the cache cannot be read
+        diskcache does blocking SQLite I/O, so it runs off the event loop, and
+        a cache failure only costs the cached lookup, never the request
+        """
+        try:
+            return await asyncio.to_thread(self.cache.get, key)
+        except Exception as e:
+            logger.warning("Spoonacular cache read failed: %s", e)
+            return None
+    
+    async def _cache_set(self, key, result: Dict) -> None:
+        """
+        Store a lookup result, logging rather than raising on failure
+        """
+        try:
+            await asyncio.to_thread(self.cache.set, key, result, expire=CACHE_TTL)
+        except Exception as e:
+            logger.warning("Spoonacular cache write failed: %s", e)
         
-    def search_recipes_by_name(self, dish_name: str, number: int = 5) -> List[Dict]:
+    async def search_recipes_by_name(self, dish_name: str,
+                                     number: int = 5) -> Tuple[List[Dict], List[str]]:
         """
         Search for recipes by dish name
+        Returns the recipes and the sorted names of their ingredients, which
+        the search already includes
         """
         try:
-            endpoint = f"{self.base_url}/recipes/complexSearch"
+            endpoint = "/recipes/complexSearch"
             params = {
                 'apiKey': self.api_key,
                 'query': dish_name,
@@ -28,78 +113,73 @@ class SpoonacularService:
                 'instructionsRequired': False
             }
             
-            logger.info(f"Searching Spoonacular for dish: {dish_name}")
-            response = self.session.get(endpoint, params=params, timeout=10)
+            logger.info("Searching Spoonacular for dish: %s", dish_name)
+            response = await self._get(endpoint, params)
             response.raise_for_status()
             
-            data = response.json()
+            data = orjson.loads(response.content)
             recipes = data.get('results', [])
+            ingredients = {
+                sys.intern((ingredient.get('name') or ingredient.get('originalName') or '').lower())
+                for recipe in recipes
+                for ingredient in recipe.get('extendedIngredients', ())
+            }
+            ingredients.discard('')
             
-            logger.info(f"Found {len(recipes)} recipes for '{dish_name}'")
-            return recipes
+            logger.info("Found %d recipes for '%s'", len(recipes), dish_name)
+            return recipes, sorted(ingredients)
             
-        except requests.exceptions.RequestException as e:
-            logger.error(f"Spoonacular API request failed: {str(e)}")
-            return []
+        except httpx.HTTPError as e:
+            logger.error("Spoonacular API request failed: %s", e)
+            return [], []
         except Exception as e:
-            logger.error(f"Unexpected error in Spoonacular search: {str(e)}")
-            return []
+            logger.error("Unexpected error in Spoonacular search: %s", e)
+            return [], []
     
-    def get_recipe_ingredients(self, recipe_id: int) -> List[Dict]:
+    async def get_recipe_ingredients(self, recipe_id: int) -> List[Dict]:
         """
         Get detailed ingredients for a specific recipe
         """
         try:
-            endpoint = f"{self.base_url}/recipes/{recipe_id}/ingredientWidget.json"
+            endpoint = f"/recipes/{recipe_id}/ingredientWidget.json"
             params = {
                 'apiKey': self.api_key
             }
             
-            logger.info(f"Getting ingredients for recipe ID: {recipe_id}")
-            response = self.session.get(endpoint, params=params, timeout=10)
+            logger.info("Getting ingredients for recipe ID: %s", recipe_id)
+            response = await self._get(endpoint, params)
             response.raise_for_status()
             
-            data = response.json()
+            data = orjson.loads(response.content)
             ingredients = data.get('ingredients', [])
             
-            logger.info(f"Found {len(ingredients)} ingredients for recipe {recipe_id}")
+            logger.info("Found %d ingredients for recipe %s", len(ingredients), recipe_id)
             return ingredients
             
-        except requests.exceptions.RequestException as e:
-            logger.error(f"Spoonacular ingredient request failed: {str(e)}")
+        except httpx.HTTPError as e:
+            logger.error("Spoonacular ingredient request failed: %s", e)
             return []
         except Exception as e:
-            logger.error(f"Unexpected error getting ingredients: {str(e)}")
+            logger.error("Unexpected error getting ingredients: %s", e)
             return []
     
-    def extract_ingredients_from_recipes(self, recipes: List[Dict]) -> List[str]:
-        """
-        Extract ingredient names from recipe data
-        """
-        ingredients = set()
-        
-        for recipe in recipes:
-            # Get ingredients from extended ingredients
-            if 'extendedIngredients' in recipe:
-                for ingredient in recipe['extendedIngredients']:
-                    if 'name' in ingredient:
-                        ingredients.add(ingredient['name'].lower())
-                    elif 'originalName' in ingredient:
-                        ingredients.add(ingredient['originalName'].lower())
-        
-        return sorted(list(ingredients))
-    
-    def find_ingredients_for_dish(self, dish_name: str) -> Dict:
+    async def find_ingredients_for_dish(self, dish_name: str) -> Dict:
         """
         Find ingredients for a dish name
         Returns dict with ingredients and metadata
         """
+        # Only found recipes are cached; an empty search may be a failed request
+        key = ('dish', dish_name.lower().strip())
+        cached = await self._cache_get(key)
+        if cached is not None:
+            return {**cached, 'dish_name': dish_name}
+        
         try:
             # Search for recipes
-            recipes = self.search_recipes_by_name(dish_name)
+            recipes, ingredients = await self.search_recipes_by_name(dish_name)
             
             if not recipes:
-                logger.warning(f"No recipes found for dish: {dish_name}")
+                logger.warning("No recipes found for dish: %s", dish_name)
                 return {
                     'dish_name': dish_name,
                     'ingredients': [],
@@ -108,10 +188,7 @@ class SpoonacularService:
                     'recipe_count': 0
                 }
             
-            # Extract ingredients from recipes
-            ingredients = self.extract_ingredients_from_recipes(recipes)
-            
-            return {
+            result = {
                 'dish_name': dish_name,
                 'ingredients': ingredients,
                 'source': 'spoonacular',
@@ -119,9 +196,8 @@ class SpoonacularService:
                 'recipe_count': len(recipes),
                 'confidence': min(1.0, len(recipes) / 3)  # Higher confidence with more recipes
             }
-            
         except Exception as e:
-            logger.error(f"Error finding ingredients for dish '{dish_name}': {str(e)}")
+            logger.error("Error finding ingredients for dish '%s': %s", dish_name, e)
             return {
                 'dish_name': dish_name,
                 'ingredients': [],
@@ -129,3 +205,6 @@ class SpoonacularService:
                 'found_recipes': False,
                 'error': str(e)
             }
+        
+        await self._cache_set(key, result)
+        return result
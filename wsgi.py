@@ -4,11 +4,12 @@ This file is used by Gunicorn to serve the Flask application
 """
 import os
 import sys
-from main import app
+from main import app, asgi_app
 
 # Ensure the project directory is in Python path
 if __name__ == "__main__":
     app.run()
 
-# For Gunicorn: gunicorn wsgi:app
-application = app
+# For Gunicorn, which runs uvicorn workers (see gunicorn.conf.py) and so needs
+# the ASGI app: gunicorn --config gunicorn.conf.py wsgi:application
+application = asgi_app